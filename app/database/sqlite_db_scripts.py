@@ -3,8 +3,12 @@
 # (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
 
 import sqlite3
+from typing import TYPE_CHECKING
 
-import aiosqlite3
+from app import startup
+
+if TYPE_CHECKING:
+    import aiosqlite3
 
 
 class DBScripts:
@@ -89,16 +93,19 @@ class DBScripts:
     }
 
     @staticmethod
-    async def create_connection(filename: str) -> aiosqlite3.Connection:
+    async def create_connection(filename: str) -> 'aiosqlite3.Connection':
+        aiosqlite3 = await startup.import_module_async('aiosqlite3')
         connection = await aiosqlite3.connect(filename, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
         # verify database version
         read_version = (await (await connection.execute('PRAGMA user_version')).fetchone())[0]
         if read_version > DBScripts.DATABASE_VERSION:
             raise RuntimeError(
                 f'Unexpected database version: read_version={read_version} code_version={DBScripts.DATABASE_VERSION}.')
-        await connection.executescript(DBScripts.DATABASE_SETTINGS)
+        # settings and pending updates are applied by a single script
+        script = [DBScripts.DATABASE_SETTINGS]
         for version in range(read_version, DBScripts.DATABASE_VERSION):
             if version in DBScripts.UPDATE_DATABASE_INCREMENTAL:
-                await connection.executescript(DBScripts.UPDATE_DATABASE_INCREMENTAL[version])
+                script.append(DBScripts.UPDATE_DATABASE_INCREMENTAL[version])
+        await connection.executescript('\n'.join(script))
         await connection.commit()
         return connection
@@ -11,9 +11,11 @@ from typing import Any, Dict, List, Optional
 
 from pytimeparse.timeparse import timeparse
 
+from app import startup
 from app.database.common import DBException
 from app.database.sqlite_db_scripts import DBScripts
 from app.filetime import dt_to_filetime, filetime_to_dt
+from app.profiling import profiler
 from app.protocols import DBProviderProtocol
 
 logger = logging.getLogger(__name__)
@@ -30,6 +32,7 @@ class DBProvider(DBProviderProtocol):
         self.conn = None
         self.lock = asyncio.Lock()
         self.initialized_sources = asyncio.Event()
+        self.opened = False
 
     @staticmethod
     def get_syntax() -> str:
@@ -49,6 +52,10 @@ class DBProvider(DBProviderProtocol):
             with await DBScripts.create_connection(DBProvider.DATABASE_NAME
                                                    ) as conn:
                 self.conn = conn
+                if not self.opened:
+                    self.opened = True
+                    logger.info(f'database first opened '
+                                f'{startup.elapsed():.3f} sec after process start')
                 await self._update_sources()
                 while True:
                     timeout = await self._check_dbclean()
@@ -75,24 +82,25 @@ class DBProvider(DBProviderProtocol):
                     sql = f"INSERT INTO sources ({','.join(params.keys())}) "\
                         f"VALUES ({','.join(('@'+key for key in params.keys()))})"
                     source['id'] = await self.execute(sql, params)
-                    await source['create_table'](source['table_name'])
         finally:
             self.initialized_sources.set()
 
     async def execute(self, sql: str, params: Optional[Dict[str, Any]]) -> int:
-        async with self.lock:
+        async with profiler.acquire(self.lock, 'DBProvider.lock'):
             try:
-                cursor = await self.conn.execute(sql, params)
-                await self.conn.commit()
+                with profiler.span('DBProvider.execute'):
+                    cursor = await self.conn.execute(sql, params)
+                    await self.conn.commit()
                 return cursor.lastrowid
             except sqlite3.Error as e:
                 raise DBException from e
 
     async def executemany(self, sql: str, params: List) -> int:
-        async with self.lock:
+        async with profiler.acquire(self.lock, 'DBProvider.lock'):
             try:
-                cursor = await self.conn.executemany(sql, params)
-                await self.conn.commit()
+                with profiler.span('DBProvider.executemany'):
+                    cursor = await self.conn.executemany(sql, params)
+                    await self.conn.commit()
                 return cursor.lastrowid
             except sqlite3.Error as e:
                 raise DBException from e
@@ -141,23 +149,24 @@ class DBProvider(DBProviderProtocol):
         rest_time = utcnow_dt - \
             timedelta(seconds=timeparse(self.config['request_history_age']))
         ft = dt_to_filetime(rest_time)
-        async with self.lock:
-            await self.conn.execute(
-                "DELETE FROM requests WHERE request_time < ?", (ft, ))
-            cursor = await self.conn.execute(
-                "SELECT count(*) FROM sources WHERE config_time >= ?", (ft, ))
-            value = await cursor.fetchone()
-            if value[0] > 0:
+        async with profiler.acquire(self.lock, 'DBProvider.lock'):
+            with profiler.span('DBProvider._clean_database'):
                 await self.conn.execute(
-                    "DELETE FROM sources WHERE config_time < ?", (ft, ))
-            await self.conn.execute(
-                "INSERT INTO db_cleans (storage_period, removed_records) VALUES (?,changes())",
-                (self.config['request_history_age'], ))
-            await self.conn.execute(
-                """DELETE FROM db_cleans WHERE rowid not in
-            (SELECT rowid from db_cleans ORDER BY db_time DESC limit ?) """,
-                (self.config['last_cleaning_records'], ))
-            await self.conn.commit()
+                    "DELETE FROM requests WHERE request_time < ?", (ft, ))
+                cursor = await self.conn.execute(
+                    "SELECT count(*) FROM sources WHERE config_time >= ?", (ft, ))
+                value = await cursor.fetchone()
+                if value[0] > 0:
+                    await self.conn.execute(
+                        "DELETE FROM sources WHERE config_time < ?", (ft, ))
+                await self.conn.execute(
+                    "INSERT INTO db_cleans (storage_period, removed_records) VALUES (?,changes())",
+                    (self.config['request_history_age'], ))
+                await self.conn.execute(
+                    """DELETE FROM db_cleans WHERE rowid not in
+                (SELECT rowid from db_cleans ORDER BY db_time DESC limit ?) """,
+                    (self.config['last_cleaning_records'], ))
+                await self.conn.commit()
 
     async def _close(self):
         assert (self.current_task is not None)
@@ -12,13 +12,28 @@ import signal
 import sys
 from typing import Dict, Any
 
-from app.runner import Runner
+from app import startup
+from app.profiling import profiler
 
 
 def get_script_path() -> str:
     return os.path.dirname(os.path.realpath(sys.argv[0]))
 
 
+def positive_float(value: str) -> float:
+    result = float(value)
+    if result <= 0:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive number')
+    return result
+
+
+def positive_int(value: str) -> int:
+    result = int(value)
+    if result <= 0:
+        raise argparse.ArgumentTypeError(f'{value} is not a positive number')
+    return result
+
+
 def parse_args() -> Namespace:
     """parse command line arguments"""
     parser = argparse.ArgumentParser()
@@ -26,6 +41,31 @@ def parse_args() -> Namespace:
                         '--config',
                         help='Path to the configuration file',
                         default='')
+    parser.add_argument('--profile',
+                        help='Start with profiling enabled '
+                        '(toggled at runtime by SIGUSR1)',
+                        action='store_true')
+    parser.add_argument('--profile-dir',
+                        help='Directory for profiling snapshots',
+                        default='profile')
+    parser.add_argument('--slow-callback',
+                        help='Slow callback threshold in seconds',
+                        type=positive_float,
+                        default=0.1)
+    parser.add_argument('--slow-span',
+                        help='Threshold in seconds for logging slow plugin, '
+                        'request and database calls',
+                        type=positive_float,
+                        default=1.0)
+    parser.add_argument('--profile-interval',
+                        help='Interval between profiling snapshots in seconds',
+                        type=positive_float,
+                        default=60.0)
+    parser.add_argument('--profile-top',
+                        help='Number of top functions and allocators '
+                        'in a snapshot',
+                        type=positive_int,
+                        default=25)
     return parser.parse_args()
 
 
@@ -58,6 +98,8 @@ def main() -> None:
                         filename=filename)
     logger = logging.getLogger(__name__)
 
+    Runner = startup.import_module('app.runner').Runner
+
     loop = asyncio.get_event_loop()
 
     def graceful_shutdown(signum: Any = None, frame: Any = None) -> None:
@@ -68,18 +110,32 @@ def main() -> None:
         loop.add_signal_handler(getattr(signal, signame), graceful_shutdown,
                                 signame)
 
-    logger.info('SERVICE STARTED')
+    profiler.configure(loop,
+                       directory=args.profile_dir,
+                       slow_callback=args.slow_callback,
+                       slow_span=args.slow_span,
+                       interval=args.profile_interval,
+                       top=args.profile_top)
+    loop.add_signal_handler(signal.SIGUSR1, profiler.toggle)
+    if args.profile:
+        profiler.start()
+
+    logger.info(
+        f'SERVICE STARTED {startup.elapsed():.3f} sec after process start')
     try:
         with Runner(config):
             loop.run_forever()
     except KeyboardInterrupt:
         graceful_shutdown()
     finally:
+        # queue the final profiling snapshot before anything could fail
+        profiler.stop()
         # Let's also finish all running tasks:
         pending = asyncio.Task.all_tasks()
         # Run loop until tasks done:
         loop.run_until_complete(asyncio.gather(*pending))
         loop.close()
+        profiler.close()
     logger.info('SERVICE FINISHED')
 
 
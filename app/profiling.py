@@ -0,0 +1,246 @@
+# Copyright (c) 2020, Alexey Sokolov  <idales2020@outlook.com>
+# Creative Commons BY-NC-SA 4.0 International Public License
+# (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import cProfile
+from contextlib import contextmanager
+from datetime import datetime
+import io
+import linecache
+import logging
+import os
+import pstats
+import time
+import traceback
+import tracemalloc
+from types import TracebackType
+from typing import Dict, Iterator, List, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+# allocations excluded from the snapshots: the profiler itself and
+# source tracebacks captured by the asyncio debug mode
+TRACE_FILTERS = [
+    tracemalloc.Filter(False, module_file)
+    for module_file in (__file__, pstats.__file__, cProfile.__file__,
+                        tracemalloc.__file__, traceback.__file__,
+                        linecache.__file__)
+]
+
+
+class SpanStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+
+class SnapshotWriter:
+    """formats and writes snapshots in the profiler thread,
+    accumulates function statistics of one profiling session"""
+
+    def __init__(self, directory: str, top: int) -> None:
+        self.directory = directory
+        self.top = top
+        self.stats: Optional[pstats.Stats] = None
+        self.previous: Optional[tracemalloc.Snapshot] = None
+
+    def write(self, stamp: str, spans: List[str],
+              snapshot: tracemalloc.Snapshot, profile: cProfile.Profile,
+              collect_time: float) -> None:
+        try:
+            start = time.perf_counter()
+            base = os.path.join(self.directory, f'profile-{stamp}')
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+            self.stats.dump_stats(base + '.prof')
+            stream = io.StringIO()
+            self.stats.stream = stream  # type: ignore
+            self.stats.sort_stats('cumulative').print_stats(self.top)
+            snapshot = snapshot.filter_traces(TRACE_FILTERS)
+            lines = ['== spans (count, total sec, max sec) ==']
+            lines.extend(spans)
+            if self.previous is None:
+                lines.append(f'== top {self.top} allocators ==')
+                statistics = snapshot.statistics('lineno')
+            else:
+                # growth since the previous snapshot, transient allocations
+                # of the previous write are already freed
+                lines.append(
+                    f'== top {self.top} allocators since previous snapshot ==')
+                statistics = snapshot.compare_to(self.previous, 'lineno')
+            self.previous = snapshot
+            lines.extend(str(stat) for stat in statistics[:self.top])
+            lines.append(f'== top {self.top} functions ==')
+            lines.append(stream.getvalue())
+            with open(base + '.txt', 'w') as file:
+                file.write('\n'.join(lines))
+            logger.info(
+                f'Profile snapshot written to {base}.txt, '
+                f'event loop blocked for {collect_time:.3f} sec, '
+                f'written in {time.perf_counter() - start:.3f} sec')
+        except Exception:
+            logger.error('Profile snapshot failed', exc_info=True)
+
+
+class Profiler:
+    """Opt-in diagnostics: asyncio slow callbacks, timing spans and
+    periodic cProfile/tracemalloc snapshots written to a directory."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.directory = 'profile'
+        self.slow_callback = 0.1
+        self.slow_span = 1.0
+        self.interval = 60.0
+        self.top = 25
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.spans: Dict[str, SpanStats] = {}
+        self._profile: Optional[cProfile.Profile] = None
+        self._writer: Optional[SnapshotWriter] = None
+        self._dump_handle: Optional[asyncio.TimerHandle] = None
+        self._write_future: Optional[Future] = None
+        # single thread keeps snapshots of a session in order
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def configure(self, loop: asyncio.AbstractEventLoop, directory: str,
+                  slow_callback: float, slow_span: float, interval: float,
+                  top: int) -> None:
+        self.loop = loop
+        self.directory = directory
+        self.slow_callback = slow_callback
+        self.slow_span = slow_span
+        self.interval = interval
+        self.top = top
+
+    def start(self) -> None:
+        if self.enabled:
+            return
+        assert (self.loop is not None)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            logger.error(f'Profiling not started: {str(e)}')
+            return
+        self.spans = {}
+        self._writer = SnapshotWriter(self.directory, self.top)
+        self.loop.slow_callback_duration = self.slow_callback
+        self.loop.set_debug(True)
+        tracemalloc.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        self.enabled = True
+        self._schedule_dump()
+        logger.info(f'Profiling started, snapshots to {self.directory}')
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+        assert (self.loop is not None)
+        if self._dump_handle is not None:
+            self._dump_handle.cancel()
+            self._dump_handle = None
+        self.dump(restart=False)
+        tracemalloc.stop()
+        self.loop.set_debug(False)
+        self.enabled = False
+        logger.info('Profiling stopped')
+
+    def toggle(self) -> None:
+        if self.enabled:
+            self.stop()
+        else:
+            self.start()
+
+    def close(self) -> None:
+        """wait for the queued snapshots to be written"""
+        self._executor.shutdown(wait=True)
+
+    def _schedule_dump(self) -> None:
+        assert (self.loop is not None)
+        self._dump_handle = self.loop.call_later(self.interval,
+                                                 self._periodic_dump)
+
+    def _periodic_dump(self) -> None:
+        if self._write_future is not None and not self._write_future.done():
+            logger.warning('Profile snapshot skipped, '
+                           'the previous one is still being written')
+        else:
+            self.dump(restart=True)
+        self._schedule_dump()
+
+    def dump(self, restart: bool) -> None:
+        """queue a snapshot of cProfile, tracemalloc and span statistics
+
+        Only the tracemalloc snapshot is taken on the calling thread,
+        statistics are formatted and written by the profiler thread.
+        """
+        assert (self._profile is not None and self._writer is not None)
+        start = time.perf_counter()
+        self._profile.disable()
+        profile = self._profile
+        if restart:
+            # the writer accumulates statistics of the finished profile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._profile = None
+        snapshot = tracemalloc.take_snapshot()
+        spans = [
+            f'{name}: {stats.count} {stats.total:.3f} {stats.max:.3f}'
+            for name, stats in sorted(self.spans.items(),
+                                      key=lambda item: -item[1].total)
+        ]
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        self._write_future = self._executor.submit(self._writer.write, stamp, spans, snapshot,
+                                                   profile,
+                                                   time.perf_counter() - start)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """measure the block duration while profiling is enabled"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.spans.setdefault(name, SpanStats()).add(duration)
+            if duration >= self.slow_span:
+                logger.warning(f'{name} took {duration:.3f} sec')
+
+    def acquire(self, lock: asyncio.Lock, name: str) -> 'TimedLock':
+        return TimedLock(self, lock, name)
+
+
+class TimedLock:
+    """async context manager measuring the time spent waiting for a lock"""
+
+    def __init__(self, profiler: Profiler, lock: asyncio.Lock,
+                 name: str) -> None:
+        self.profiler = profiler
+        self.lock = lock
+        self.name = name
+
+    async def __aenter__(self) -> None:
+        with self.profiler.span(self.name):
+            await self.lock.acquire()
+
+    async def __aexit__(self, exc_type: Optional[Type[BaseException]],
+                        exc_val: Optional[BaseException],
+                        exc_tb: Optional[TracebackType]) -> None:
+        self.lock.release()
+
+
+profiler = Profiler()
@@ -5,18 +5,19 @@
 import asyncio
 from asyncio import Task
 from datetime import datetime
-import importlib
+import importlib.util
 import logging
 import sys
-from types import TracebackType
-from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Type, Union
+from types import ModuleType, TracebackType
+from typing import Any, Dict, NamedTuple, Optional, Set, Type, Union
 
-import aiohttp
 from pytimeparse.timeparse import timeparse
 
+from app import startup
 from app.database.common import DBException
 import app.database.sqlite_provider as sqlite_db
 from app.filetime import HUNDREDS_OF_NANOSECONDS, dt_to_filetime
+from app.profiling import profiler
 from app.protocols import DBProviderProtocol, PluginProtocol
 
 logger = logging.getLogger(__name__)
@@ -46,30 +47,37 @@ def make_db_provider(config: Dict[str, Any]) -> DBProviderProtocol:
     return sqlite_db.DBProvider(config)
 
 
-def make_table_creation_method(
-        plugin: PluginProtocol) -> Callable[[str], Awaitable[int]]:
-    return plugin.create_sql_table_if_not_exists
+def plugin_module_name(name: str) -> str:
+    return f'app.siteplugins.{name}'
 
 
 class Runner:
     agent: str = "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:80.0) Gecko/20100101 Firefox/80.0"
 
     def __init__(self, config: Dict[str, Any]) -> None:
-        def load_site_plugin(name: str) -> PluginProtocol:
-            module = importlib.import_module(f'app.siteplugins.{name}')
-            # dynamic loading from siteplugins folder
-            return module.Siteplugin(self.db_provider)  # type: ignore
-
         self.config = config
         self.current_task: Optional[Task[Any]] = None
 
         self.db_provider = make_db_provider(config=config)
         sources = self.config.get('sources', None)
-        plugins_list = set([source['type'] for source in sources])
-        self.plugins = {name: load_site_plugin(name) for name in plugins_list}
-        for source in sources:
-            source['create_table'] = make_table_creation_method(
-                self.plugins[source['type']])
+        # plugins are registered by name, imported and create their tables
+        # on the first successful response
+        self.plugins: Dict[str, PluginProtocol] = {}
+        self.created_tables: Set[str] = set()
+        for name in set([source['type'] for source in sources
+                         if source['enable']]):
+            if importlib.util.find_spec(plugin_module_name(name)) is None:
+                raise ValueError(f'Unknown plugin type: {name}')
+
+    async def _get_plugin(self, name: str) -> PluginProtocol:
+        plugin = self.plugins.get(name, None)
+        if plugin is None:
+            # dynamic loading from siteplugins folder
+            module = await startup.import_module_async(
+                plugin_module_name(name))
+            plugin = self.plugins.setdefault(
+                name, module.Siteplugin(self.db_provider))  # type: ignore
+        return plugin
 
     def __enter__(self) -> 'Runner':
         asyncio.get_event_loop().call_soon(
@@ -84,8 +92,12 @@ class Runner:
     async def _loop(self) -> None:
         self.current_task = Task.current_task()
         timeout = 0.0
+        started = False
         try:
-            sources = self.config.get('sources', None)
+            sources = [
+                source for source in self.config.get('sources', None)
+                if source['enable']
+            ]
             while sources:
                 async with self.db_provider:
                     utcnow_dt = datetime.utcnow()
@@ -95,6 +107,11 @@ class Runner:
                         timeouts.append(await
                                         self._check_request(source, utcnow_ft))
                     timeout = min(timeouts)
+                    if not started:
+                        started = True
+                        logger.info(
+                            f'first requests done in {startup.elapsed():.3f} sec'
+                        )
                     logger.info(f'next request after {timeout} sec')
                     await asyncio.sleep(timeout)
 
@@ -111,9 +128,11 @@ class Runner:
         if last_request_time is None or last_request_time // interval_ft != utcnow_ft // interval_ft:
             # make request
             url = source['url']
+            aiohttp = await startup.import_module_async('aiohttp')
             try:
                 try:
-                    response = await Runner._make_request(url)
+                    with profiler.span(f'Runner._make_request {url}'):
+                        response = await Runner._make_request(aiohttp, url)
                     request_id = await self.db_provider.write_request(
                         source['id'], utcnow_ft, response.status)
                     await self._parse_response(response, request_id, source)
@@ -133,7 +152,7 @@ class Runner:
         return ft_to_seconds(timeout)
 
     @staticmethod
-    async def _make_request(url: str) -> Response:
+    async def _make_request(aiohttp: ModuleType, url: str) -> Response:
         async with aiohttp.ClientSession(
                 headers={'User-Agent': Runner.agent}) as session:
             async with session.get(url) as response:
@@ -143,8 +162,13 @@ class Runner:
     async def _parse_response(self, response: Response, request_id: int,
                               source: Dict[str, Any]) -> None:
         if response.status == 200:
-            await self.plugins[source['type']].parse(response.text, request_id,
-                                                     source['table_name'])
+            plugin = await self._get_plugin(source['type'])
+            table_name = source['table_name']
+            if table_name not in self.created_tables:
+                await plugin.create_sql_table_if_not_exists(table_name)
+                self.created_tables.add(table_name)
+            with profiler.span(f"{source['type']}.parse"):
+                await plugin.parse(response.text, request_id, table_name)
         else:
             logger.error(f'Wrong status {response.status}')
 
@@ -0,0 +1,54 @@
+# Copyright (c) 2020, Alexey Sokolov  <idales2020@outlook.com>
+# Creative Commons BY-NC-SA 4.0 International Public License
+# (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import time
+from types import ModuleType
+
+logger = logging.getLogger(__name__)
+
+
+def process_age() -> float:
+    """seconds since the process was started by the system,
+    includes interpreter startup"""
+    try:
+        with open('/proc/self/stat') as file:
+            # fields after the command name, starttime is field 22
+            start_ticks = int(file.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as file:
+            uptime = float(file.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+STARTED = time.perf_counter() - process_age()
+
+
+def elapsed() -> float:
+    """seconds since the process start"""
+    return time.perf_counter() - STARTED
+
+
+def import_module(name: str) -> ModuleType:
+    """import module and log its import time on the first import"""
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    logger.info(
+        f'import {name}: {(time.perf_counter() - start) * 1000:.1f} ms')
+    return module
+
+
+async def import_module_async(name: str) -> ModuleType:
+    """import module in executor not to block the event loop"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return await asyncio.get_event_loop().run_in_executor(
+        None, import_module, name)